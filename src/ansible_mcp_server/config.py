@@ -1,9 +1,16 @@
 """Configuration management for Ansible MCP Server."""
 
-import json
+import contextlib
+import functools
 import os
+import stat
+import tempfile
+from collections.abc import Iterator
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import IO, Any
+
+import orjson
 
 
 @dataclass
@@ -26,13 +33,56 @@ class ServerConfiguration:
     default_project: str | None = None
 
 
+class FullEnv(dict[str, str]):
+    """A complete process environment, as opposed to overrides for one.
+
+    Commands given a FullEnv pass it to the child unchanged instead of
+    merging it onto the server environment again.
+    """
+
+
+_MCP_ENV_PREFIX = "MCP_ANSIBLE_ENV_"
+_MCP_ENV_PREFIX_LEN = len(_MCP_ENV_PREFIX)
+
+# Process umask, read once at startup, used for the mode of newly written
+# files since mkstemp always creates them owner-only
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# Last loaded configuration, keyed on the file it came from and its mtime
+_CONFIG_CACHE: tuple[Path, int, ServerConfiguration] | None = None
+
+# Project environment overlays, keyed by project name
+_ENV_CACHE: dict[str, tuple[tuple, dict[str, str]]] = {}
+
+# Full project environments, keyed by project name and valid while the
+# overlay they were built from is still the cached one
+_FULL_ENV_CACHE: dict[str, tuple[dict[str, str], FullEnv]] = {}
+
+
 def _config_path() -> Path:
     """Get configuration file path.
 
     Returns:
         Path to configuration file
     """
-    if env_path := os.getenv("MCP_ANSIBLE_CONFIG"):
+    return _locate_config(os.getenv("MCP_ANSIBLE_CONFIG"))
+
+
+@functools.lru_cache(maxsize=1)
+def _locate_config(env_path: str | None) -> Path:
+    """Locate the configuration file.
+
+    Cached so the local config lookup does not stat the filesystem on every
+    access; the cache follows changes to MCP_ANSIBLE_CONFIG automatically.
+
+    Args:
+        env_path: Value of MCP_ANSIBLE_CONFIG, if set
+
+    Returns:
+        Path to configuration file
+    """
+    if env_path:
         return Path(env_path)
 
     local_config = Path.cwd() / ".ansible-mcp-config.json"
@@ -42,6 +92,43 @@ def _config_path() -> Path:
     return Path.home() / ".ansible-mcp-config.json"
 
 
+@contextlib.contextmanager
+def atomic_write(path: Path, mode: str = "w") -> Iterator[IO[Any]]:
+    """Open a file for writing so it is replaced in one step on success.
+
+    Data goes to a uniquely named temp file next to the real target, which
+    keeps the target's permissions and is swapped in with os.replace().
+    Symlinks are written through rather than replaced. If the body raises,
+    the temp file is removed and the target is left untouched.
+
+    Args:
+        path: File to write
+        mode: "w" for UTF-8 text or "wb" for bytes
+
+    Yields:
+        Open file object for the temp file
+    """
+    target = path.resolve()
+    fd, tmp_name = tempfile.mkstemp(
+        dir=target.parent, prefix=f".{target.name}.", suffix=".tmp"
+    )
+
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else "utf-8") as f:
+            yield f
+
+        try:
+            file_mode = stat.S_IMODE(target.stat().st_mode)
+        except FileNotFoundError:
+            file_mode = 0o666 & ~_UMASK
+        os.chmod(tmp_name, file_mode)
+        os.replace(tmp_name, target)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_name)
+        raise
+
+
 def load_config() -> ServerConfiguration:
     """Load server configuration from file.
 
@@ -54,8 +141,8 @@ def load_config() -> ServerConfiguration:
         return ServerConfiguration()
 
     try:
-        with open(config_file) as f:
-            data = json.load(f)
+        # The file is always UTF-8, whatever the locale encoding
+        data = orjson.loads(config_file.read_bytes())
 
         projects = {}
         for name, proj_data in data.get("projects", {}).items():
@@ -76,14 +163,64 @@ def load_config() -> ServerConfiguration:
         raise RuntimeError(f"Failed to load configuration: {e}")
 
 
+def _config_mtime(config_file: Path) -> int:
+    """Get modification time of the configuration file.
+
+    Args:
+        config_file: Path to configuration file
+
+    Returns:
+        Modification time in nanoseconds, or -1 if the file does not exist
+    """
+    try:
+        return config_file.stat().st_mtime_ns
+    except FileNotFoundError:
+        return -1
+
+
+def get_config() -> ServerConfiguration:
+    """Get server configuration, reloading only when the file changed.
+
+    Returns:
+        Cached ServerConfiguration object
+    """
+    global _CONFIG_CACHE
+
+    config_file = _config_path()
+    mtime = _config_mtime(config_file)
+
+    if _CONFIG_CACHE is not None:
+        cached_path, cached_mtime, cached_config = _CONFIG_CACHE
+        if cached_path == config_file and cached_mtime == mtime:
+            return cached_config
+
+    config = load_config()
+    _CONFIG_CACHE = (config_file, mtime, config)
+    return config
+
+
+def reload_config() -> ServerConfiguration:
+    """Locate and load the configuration again, bypassing all caches.
+
+    Returns:
+        Freshly loaded ServerConfiguration object
+    """
+    global _CONFIG_CACHE
+
+    _locate_config.cache_clear()
+    _CONFIG_CACHE = None
+    return get_config()
+
+
 def save_config(config: ServerConfiguration) -> None:
     """Save server configuration to file.
 
     Args:
         config: ServerConfiguration to save
     """
-    from typing import Any
+    global _CONFIG_CACHE
 
+    _locate_config.cache_clear()
     config_file = _config_path()
 
     data: dict[str, Any] = {
@@ -101,39 +238,127 @@ def save_config(config: ServerConfiguration) -> None:
         }
 
     config_file.parent.mkdir(parents=True, exist_ok=True)
-    with open(config_file, "w") as f:
-        json.dump(data, f, indent=2)
 
+    # Readers never see a partially written configuration
+    with atomic_write(config_file, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+    _CONFIG_CACHE = (config_file, _config_mtime(config_file), config)
+    invalidate_env_cache()
+
+
+def _forwarded_env() -> dict[str, str]:
+    """Collect MCP_ANSIBLE_ENV_* variables to forward to Ansible.
+
+    Returns:
+        Dictionary of environment variables with the prefix stripped
+    """
+    return {
+        key[_MCP_ENV_PREFIX_LEN:]: value
+        for key, value in os.environ.items()
+        if key.startswith(_MCP_ENV_PREFIX)
+    }
+
+
+# The server environment is snapshotted once; call refresh_environment()
+# after changing os.environ at runtime
+_BASE_ENV = FullEnv(os.environ)
+_MCP_ENV_FORWARDED = _forwarded_env()
+_PROJECT_NAME_ENV = os.getenv("MCP_ANSIBLE_PROJECT_NAME")
+
+
+def refresh_environment() -> None:
+    """Re-read the server environment and MCP_ANSIBLE_* settings."""
+    global _BASE_ENV, _MCP_ENV_FORWARDED, _PROJECT_NAME_ENV
+
+    _BASE_ENV = FullEnv(os.environ)
+    _MCP_ENV_FORWARDED = _forwarded_env()
+    _PROJECT_NAME_ENV = os.getenv("MCP_ANSIBLE_PROJECT_NAME")
+    invalidate_env_cache()
+
+
+def base_env() -> FullEnv:
+    """Get the server environment snapshot.
+
+    The returned dictionary is shared and must not be modified.
+
+    Returns:
+        Dictionary of environment variables
+    """
+    return _BASE_ENV
 
-def project_env(project: ProjectDefinition) -> dict[str, str]:
-    """Build environment variables for a project.
+
+def project_env_overlay(project: ProjectDefinition) -> dict[str, str]:
+    """Build the environment variables a project adds to the server env.
+
+    The result is cached per project and rebuilt only when the project's
+    paths or env vars change. The returned dictionary is shared and must not
+    be modified.
 
     Args:
         project: ProjectDefinition to build env for
 
     Returns:
-        Dictionary of environment variables
+        Dictionary of environment variable overrides
     """
-    env = os.environ.copy()
+    key = (
+        tuple(project.roles_path or ()),
+        tuple(project.collections_paths or ()),
+        tuple(project.env_vars.items()),
+    )
+
+    cached = _ENV_CACHE.get(project.name)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    overlay = {}
 
     if project.roles_path:
-        env["ANSIBLE_ROLES_PATH"] = ":".join(project.roles_path)
+        overlay["ANSIBLE_ROLES_PATH"] = ":".join(project.roles_path)
 
     if project.collections_paths:
-        env["ANSIBLE_COLLECTIONS_PATH"] = ":".join(project.collections_paths)
+        overlay["ANSIBLE_COLLECTIONS_PATH"] = ":".join(project.collections_paths)
 
     # Add custom env vars from project
-    env.update(project.env_vars)
+    overlay.update(project.env_vars)
 
     # Add MCP-specific env vars that can be forwarded
-    for key, value in os.environ.items():
-        if key.startswith("MCP_ANSIBLE_ENV_"):
-            actual_key = key.replace("MCP_ANSIBLE_ENV_", "")
-            env[actual_key] = value
+    overlay.update(_MCP_ENV_FORWARDED)
+
+    _ENV_CACHE[project.name] = (key, overlay)
+    return overlay
+
+
+def project_env(project: ProjectDefinition) -> FullEnv:
+    """Build environment variables for a project.
 
+    The result is cached alongside the project's overlay. The returned
+    dictionary is shared and must not be modified.
+
+    Args:
+        project: ProjectDefinition to build env for
+
+    Returns:
+        Dictionary of environment variables
+    """
+    overlay = project_env_overlay(project)
+
+    cached = _FULL_ENV_CACHE.get(project.name)
+    if cached is not None and cached[0] is overlay:
+        return cached[1]
+
+    env = FullEnv(_BASE_ENV)
+    env.update(overlay)
+    _FULL_ENV_CACHE[project.name] = (overlay, env)
     return env
 
 
+def invalidate_env_cache() -> None:
+    """Drop all cached project environments and overlays."""
+    _ENV_CACHE.clear()
+    _FULL_ENV_CACHE.clear()
+
+
 def resolve_project(
     config: ServerConfiguration, project_name: str | None = None
 ) -> ProjectDefinition | None:
@@ -151,8 +376,8 @@ def resolve_project(
         return config.projects.get(project_name)
 
     # Environment override
-    if env_project := os.getenv("MCP_ANSIBLE_PROJECT_NAME"):
-        return config.projects.get(env_project)
+    if _PROJECT_NAME_ENV:
+        return config.projects.get(_PROJECT_NAME_ENV)
 
     # Default project
     if config.default_project:
@@ -160,6 +385,6 @@ def resolve_project(
 
     # Single project shortcut
     if len(config.projects) == 1:
-        return list(config.projects.values())[0]
+        return next(iter(config.projects.values()))
 
     return None
@@ -1,17 +1,22 @@
 """Ansible MCP Server - Main server implementation."""
 
-import json
+import functools
 import os
-import tempfile
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+import orjson
 from fastmcp import FastMCP
 
 from ansible_mcp_server.config import (
     ProjectDefinition,
-    load_config,
+    atomic_write,
+    get_config,
     project_env,
+    project_env_overlay,
     resolve_project,
     save_config,
 )
@@ -19,17 +24,99 @@ from ansible_mcp_server.utils import (
     calculate_health_score,
     dict_to_module_args,
     discover_playbooks,
+    dump_playbook,
     extract_hosts_from_inventory_json,
+    group_index_from_inventory_json,
+    invalidate_playbook_cache,
     run_command,
-    serialize_playbook,
+    run_command_bytes,
     split_paths,
 )
 
 # Initialize MCP server
 mcp = FastMCP("ansible-mcp")
 
-# Global configuration
-config = load_config()
+# The server is long-lived and its environment effectively constant, so the
+# default inventory is read once at startup rather than on every tool call;
+# changing MCP_ANSIBLE_INVENTORY afterwards requires a restart
+_DEFAULT_INVENTORY = os.getenv("MCP_ANSIBLE_INVENTORY", "inventory")
+
+# Parsed inventories are reused for at most this many seconds, so dynamic
+# inventory sources whose files never change are still re-run eventually
+INVENTORY_CACHE_TTL = 300
+
+# At most this many parsed inventories are kept, least recently used first out
+INVENTORY_CACHE_SIZE = 32
+
+# Parsed inventories, keyed by _inventory_key() and stamped with the
+# inventory mtime and TTL window they were loaded in
+_INVENTORY_CACHE: OrderedDict[tuple, tuple[tuple[int, int], "InventorySnapshot"]] = (
+    OrderedDict()
+)
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize a tool response to an indented JSON string.
+
+    Used for listings and reports meant to be read in chat.
+
+    Args:
+        obj: JSON-serializable response object
+
+    Returns:
+        JSON formatted string
+    """
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+
+def _dumps_compact(obj: Any) -> str:
+    """Serialize a tool response to a compact JSON string.
+
+    Used for command results and errors that are consumed programmatically,
+    where indentation only inflates large stdout payloads.
+
+    Args:
+        obj: JSON-serializable response object
+
+    Returns:
+        JSON formatted string
+    """
+    return orjson.dumps(obj).decode()
+
+
+@dataclass
+class ToolContext:
+    """Resolved execution context for a tool call."""
+
+    project: ProjectDefinition | None
+    cwd: str | None
+    # Complete, cached project environment; None runs with the server env
+    env: dict[str, str] | None
+    inv_path: str
+
+
+def _tool_context(
+    project_name: str | None, inventory: str | None = None
+) -> ToolContext:
+    """Resolve project, working directory, environment and inventory path.
+
+    Args:
+        project_name: Project name to use (optional)
+        inventory: Explicit inventory path (optional)
+
+    Returns:
+        ToolContext for running an Ansible command
+    """
+    proj = resolve_project(get_config(), project_name)
+
+    inv_path = inventory or (proj.inventory if proj else None) or _DEFAULT_INVENTORY
+
+    return ToolContext(
+        project=proj,
+        cwd=proj.root if proj else None,
+        env=project_env(proj) if proj else None,
+        inv_path=inv_path,
+    )
 
 
 # ============================================================================
@@ -37,6 +124,122 @@ config = load_config()
 # ============================================================================
 
 
+class InventoryError(RuntimeError):
+    """Raised when ansible-inventory fails."""
+
+    def __init__(self, stderr: str, return_code: int):
+        super().__init__(stderr)
+        self.stderr = stderr
+        self.return_code = return_code
+
+
+@dataclass
+class InventorySnapshot:
+    """Parsed ansible-inventory output shared between tool calls."""
+
+    data: dict[str, Any]
+
+    @functools.cached_property
+    def group_index(self) -> dict[str, list[str]]:
+        """Map each host to its groups, built once on first use."""
+        return group_index_from_inventory_json(self.data)
+
+
+def _inventory_mtime(inv_path: str, cwd: str | None) -> int:
+    """Get the latest modification time of an inventory source.
+
+    Directories are walked, and the group_vars/host_vars directories next
+    to an inventory file are included, so editing any file that feeds into
+    the inventory changes the result.
+
+    Args:
+        inv_path: Inventory path
+        cwd: Directory relative paths are resolved against
+
+    Returns:
+        Modification time in nanoseconds, or -1 if the path does not exist
+    """
+    path = Path(cwd or ".") / inv_path
+    if not path.exists():
+        # Not a path at all, e.g. a comma-separated host list
+        return -1
+
+    if path.is_dir():
+        trees = [path]
+        mtime = -1
+    else:
+        trees = [path.parent / "group_vars", path.parent / "host_vars"]
+        mtime = path.stat().st_mtime_ns
+
+    for tree in trees:
+        for dirpath, _, filenames in os.walk(tree):
+            for name in (dirpath, *(os.path.join(dirpath, f) for f in filenames)):
+                try:
+                    mtime = max(mtime, os.stat(name).st_mtime_ns)
+                except OSError:
+                    continue
+
+    return mtime
+
+
+def _inventory_key(ctx: ToolContext) -> tuple:
+    """Build the cache key identifying an inventory source and its env.
+
+    The project's environment overlay is part of the key, so a changed
+    project configuration never reuses output built with the old env.
+
+    Args:
+        ctx: Resolved tool context
+
+    Returns:
+        Hashable cache key
+    """
+    overlay = project_env_overlay(ctx.project) if ctx.project else {}
+    return (ctx.inv_path, ctx.cwd, tuple(overlay.items()))
+
+
+def _load_inventory(ctx: ToolContext) -> InventorySnapshot:
+    """Load the parsed inventory for a tool context, reusing recent results.
+
+    Results are reused while the inventory files are unchanged and the
+    INVENTORY_CACHE_TTL window has not rolled over. Stale entries are
+    dropped and only the INVENTORY_CACHE_SIZE most recently used are kept.
+    The returned snapshot is shared between callers and must not be
+    modified.
+
+    Args:
+        ctx: Resolved tool context
+
+    Returns:
+        Snapshot of the parsed ansible-inventory JSON
+
+    Raises:
+        InventoryError: If ansible-inventory fails
+    """
+    key = _inventory_key(ctx)
+    stamp = (
+        _inventory_mtime(ctx.inv_path, ctx.cwd),
+        int(time.monotonic() // INVENTORY_CACHE_TTL),
+    )
+
+    cached = _INVENTORY_CACHE.pop(key, None)
+    if cached is not None and cached[0] == stamp:
+        _INVENTORY_CACHE[key] = cached
+        return cached[1]
+
+    cmd = ["ansible-inventory", "-i", ctx.inv_path, "--list"]
+    rc, stdout, stderr = run_command_bytes(cmd, cwd=ctx.cwd, env=ctx.env)
+
+    if rc != 0:
+        raise InventoryError(stderr.decode(errors="replace"), rc)
+
+    snapshot = InventorySnapshot(orjson.loads(stdout))
+    _INVENTORY_CACHE[key] = (stamp, snapshot)
+    while len(_INVENTORY_CACHE) > INVENTORY_CACHE_SIZE:
+        _INVENTORY_CACHE.popitem(last=False)
+    return snapshot
+
+
 @mcp.tool()
 def ansible_inventory(
     inventory: str | None = None,
@@ -53,44 +256,36 @@ def ansible_inventory(
     Returns:
         JSON string with hosts and groups information
     """
-    proj = resolve_project(config, project)
-    env = project_env(proj) if proj else None
+    ctx = _tool_context(project, inventory)
 
-    inv_path = (
-        inventory
-        or (proj.inventory if proj else None)
-        or os.getenv("MCP_ANSIBLE_INVENTORY", "inventory")
-    )
-    assert inv_path is not None  # Always has a default value
-    cwd = proj.root if proj else None
-
-    cmd = ["ansible-inventory", "-i", inv_path, "--list"]
-
-    rc, stdout, stderr = run_command(cmd, cwd=cwd, env=env)
-
-    if rc != 0:
-        return json.dumps(
-            {"error": "Failed to list inventory", "stderr": stderr, "return_code": rc}
+    # Always parse the full inventory so the snapshot is shared with
+    # inventory_find_host and later calls instead of spawning again
+    try:
+        inventory_data = _load_inventory(ctx).data
+    except InventoryError as e:
+        return _dumps_compact(
+            {
+                "error": "Failed to list inventory",
+                "stderr": e.stderr,
+                "return_code": e.return_code,
+            }
         )
+    except orjson.JSONDecodeError as e:
+        return _dumps_compact({"error": f"Failed to parse inventory JSON: {e}"})
 
-    try:
-        inventory_data = json.loads(stdout)
-        hosts, groups = extract_hosts_from_inventory_json(inventory_data)
-
-        result = {
-            "hosts": hosts,
-            "groups": groups,
-            "total_hosts": len(hosts),
-            "total_groups": len(groups),
-        }
+    hosts, groups = extract_hosts_from_inventory_json(inventory_data)
 
-        if show_hostvars:
-            result["hostvars"] = inventory_data.get("_meta", {}).get("hostvars", {})
+    result = {
+        "hosts": hosts,
+        "groups": groups,
+        "total_hosts": len(hosts),
+        "total_groups": len(groups),
+    }
 
-        return json.dumps(result, indent=2)
+    if show_hostvars:
+        result["hostvars"] = inventory_data.get("_meta", {}).get("hostvars", {})
 
-    except json.JSONDecodeError as e:
-        return json.dumps({"error": f"Failed to parse inventory JSON: {e}"})
+    return _dumps(result)
 
 
 @mcp.tool()
@@ -107,23 +302,14 @@ def inventory_graph(
     Returns:
         Graph format inventory
     """
-    proj = resolve_project(config, project)
-    env = project_env(proj) if proj else None
+    ctx = _tool_context(project, inventory)
 
-    inv_path = (
-        inventory
-        or (proj.inventory if proj else None)
-        or os.getenv("MCP_ANSIBLE_INVENTORY", "inventory")
-    )
-    assert inv_path is not None  # Always has a default value
-    cwd = proj.root if proj else None
+    cmd = ["ansible-inventory", "-i", ctx.inv_path, "--graph"]
 
-    cmd = ["ansible-inventory", "-i", inv_path, "--graph"]
-
-    rc, stdout, stderr = run_command(cmd, cwd=cwd, env=env)
+    rc, stdout, stderr = run_command(cmd, cwd=ctx.cwd, env=ctx.env)
 
     if rc != 0:
-        return json.dumps({"error": stderr, "return_code": rc})
+        return _dumps_compact({"error": stderr, "return_code": rc})
 
     return stdout
 
@@ -144,50 +330,31 @@ def inventory_find_host(
     Returns:
         JSON string with host information
     """
-    proj = resolve_project(config, project)
-    env = project_env(proj) if proj else None
-
-    inv_path = (
-        inventory
-        or (proj.inventory if proj else None)
-        or os.getenv("MCP_ANSIBLE_INVENTORY", "inventory")
-    )
-    assert inv_path is not None  # Always has a default value
-    cwd = proj.root if proj else None
-
-    cmd = ["ansible-inventory", "-i", inv_path, "--list"]
-
-    rc, stdout, stderr = run_command(cmd, cwd=cwd, env=env)
-
-    if rc != 0:
-        return json.dumps({"error": stderr})
+    ctx = _tool_context(project, inventory)
 
     try:
-        inventory_data = json.loads(stdout)
-        hostvars = inventory_data.get("_meta", {}).get("hostvars", {})
+        snapshot = _load_inventory(ctx)
+        hostvars = snapshot.data.get("_meta", {}).get("hostvars", {})
 
         if hostname not in hostvars:
-            return json.dumps({"error": f"Host '{hostname}' not found in inventory"})
+            return _dumps_compact(
+                {"error": f"Host '{hostname}' not found in inventory"}
+            )
 
-        # Find groups containing this host
-        groups = []
-        for group_name, group_data in inventory_data.items():
-            if group_name == "_meta":
-                continue
-            if "hosts" in group_data and hostname in group_data["hosts"]:
-                groups.append(group_name)
+        groups = snapshot.group_index.get(hostname, [])
 
-        return json.dumps(
+        return _dumps(
             {
                 "hostname": hostname,
                 "groups": groups,
                 "hostvars": hostvars[hostname],
             },
-            indent=2,
         )
 
-    except json.JSONDecodeError as e:
-        return json.dumps({"error": f"Failed to parse inventory: {e}"})
+    except InventoryError as e:
+        return _dumps_compact({"error": e.stderr})
+    except orjson.JSONDecodeError as e:
+        return _dumps_compact({"error": f"Failed to parse inventory: {e}"})
 
 
 # ============================================================================
@@ -225,21 +392,12 @@ def ansible_playbook(
     Returns:
         Playbook execution results
     """
-    proj = resolve_project(config, project)
-    env = project_env(proj) if proj else None
-
-    inv_path = (
-        inventory
-        or (proj.inventory if proj else None)
-        or os.getenv("MCP_ANSIBLE_INVENTORY", "inventory")
-    )
-    assert inv_path is not None  # Always has a default value
-    cwd = proj.root if proj else None
+    ctx = _tool_context(project, inventory)
 
-    cmd = ["ansible-playbook", playbook, "-i", inv_path]
+    cmd = ["ansible-playbook", playbook, "-i", ctx.inv_path]
 
     if extra_vars:
-        cmd.extend(["--extra-vars", json.dumps(extra_vars)])
+        cmd.extend(["--extra-vars", orjson.dumps(extra_vars).decode()])
     if tags:
         cmd.extend(["--tags", tags])
     if skip_tags:
@@ -253,21 +411,19 @@ def ansible_playbook(
     if verbose > 0:
         cmd.append("-" + "v" * min(verbose, 4))
 
-    rc, stdout, stderr = run_command(cmd, cwd=cwd, env=env)
+    rc, stdout, stderr = run_command(cmd, cwd=ctx.cwd, env=ctx.env)
 
-    return json.dumps(
+    return _dumps_compact(
         {
             "return_code": rc,
             "stdout": stdout,
             "stderr": stderr,
             "success": rc == 0,
         },
-        indent=2,
     )
 
 
-@mcp.tool()
-def ansible_task(
+def _ansible_task_raw(
     hosts: str,
     module: str,
     args: dict[str, Any] | None = None,
@@ -276,8 +432,8 @@ def ansible_task(
     check: bool = False,
     verbose: int = 0,
     project: str | None = None,
-) -> str:
-    """Run an ad-hoc Ansible task.
+) -> dict[str, Any]:
+    """Run an ad-hoc Ansible task and return the unserialized result.
 
     Args:
         hosts: Host pattern
@@ -290,20 +446,11 @@ def ansible_task(
         project: Project name (optional)
 
     Returns:
-        Task execution results
+        Dictionary with return_code, stdout, stderr and success
     """
-    proj = resolve_project(config, project)
-    env = project_env(proj) if proj else None
-
-    inv_path = (
-        inventory
-        or (proj.inventory if proj else None)
-        or os.getenv("MCP_ANSIBLE_INVENTORY", "inventory")
-    )
-    assert inv_path is not None  # Always has a default value
-    cwd = proj.root if proj else None
+    ctx = _tool_context(project, inventory)
 
-    cmd = ["ansible", hosts, "-i", inv_path, "-m", module]
+    cmd = ["ansible", hosts, "-i", ctx.inv_path, "-m", module]
 
     if args:
         cmd.extend(["-a", dict_to_module_args(args)])
@@ -314,16 +461,53 @@ def ansible_task(
     if verbose > 0:
         cmd.append("-" + "v" * min(verbose, 4))
 
-    rc, stdout, stderr = run_command(cmd, cwd=cwd, env=env)
+    rc, stdout, stderr = run_command(cmd, cwd=ctx.cwd, env=ctx.env)
 
-    return json.dumps(
-        {
-            "return_code": rc,
-            "stdout": stdout,
-            "stderr": stderr,
-            "success": rc == 0,
-        },
-        indent=2,
+    return {
+        "return_code": rc,
+        "stdout": stdout,
+        "stderr": stderr,
+        "success": rc == 0,
+    }
+
+
+@mcp.tool()
+def ansible_task(
+    hosts: str,
+    module: str,
+    args: dict[str, Any] | None = None,
+    inventory: str | None = None,
+    become: bool = False,
+    check: bool = False,
+    verbose: int = 0,
+    project: str | None = None,
+) -> str:
+    """Run an ad-hoc Ansible task.
+
+    Args:
+        hosts: Host pattern
+        module: Ansible module name
+        args: Module arguments as dict (optional)
+        inventory: Inventory file path (optional)
+        become: Use privilege escalation (optional)
+        check: Run in check mode (optional)
+        verbose: Verbosity level 0-4 (optional)
+        project: Project name (optional)
+
+    Returns:
+        Task execution results
+    """
+    return _dumps_compact(
+        _ansible_task_raw(
+            hosts=hosts,
+            module=module,
+            args=args,
+            inventory=inventory,
+            become=become,
+            check=check,
+            verbose=verbose,
+            project=project,
+        )
     )
 
 
@@ -343,13 +527,14 @@ def ansible_ping(
     Returns:
         Ping results
     """
-    result = ansible_task(  # type: ignore[operator]
-        hosts=hosts,
-        module="ping",
-        inventory=inventory,
-        project=project,
+    return _dumps_compact(
+        _ansible_task_raw(
+            hosts=hosts,
+            module="ping",
+            inventory=inventory,
+            project=project,
+        )
     )
-    return str(result)
 
 
 @mcp.tool()
@@ -368,29 +553,19 @@ def validate_playbook(
     Returns:
         Validation results
     """
-    proj = resolve_project(config, project)
-    env = project_env(proj) if proj else None
+    ctx = _tool_context(project, inventory)
 
-    inv_path = (
-        inventory
-        or (proj.inventory if proj else None)
-        or os.getenv("MCP_ANSIBLE_INVENTORY", "inventory")
-    )
-    assert inv_path is not None  # Always has a default value
-    cwd = proj.root if proj else None
-
-    cmd = ["ansible-playbook", playbook, "-i", inv_path, "--syntax-check"]
+    cmd = ["ansible-playbook", playbook, "-i", ctx.inv_path, "--syntax-check"]
 
-    rc, stdout, stderr = run_command(cmd, cwd=cwd, env=env)
+    rc, stdout, stderr = run_command(cmd, cwd=ctx.cwd, env=ctx.env)
 
-    return json.dumps(
+    return _dumps_compact(
         {
             "valid": rc == 0,
             "return_code": rc,
             "stdout": stdout,
             "stderr": stderr,
         },
-        indent=2,
     )
 
 
@@ -410,7 +585,7 @@ def create_playbook(
     Returns:
         Creation result
     """
-    proj = resolve_project(config, project)
+    proj = resolve_project(get_config(), project)
     root = Path(proj.root) if proj else Path.cwd()
 
     playbook_path = root / path
@@ -418,15 +593,15 @@ def create_playbook(
     # Ensure parent directory exists
     playbook_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Convert content to YAML if needed
-    if isinstance(content, dict | list):
-        yaml_content = serialize_playbook(content)
-    else:
-        yaml_content = content
-
     try:
-        playbook_path.write_text(yaml_content)
-        return json.dumps(
+        # A failed write never truncates an existing playbook
+        with atomic_write(playbook_path) as f:
+            if isinstance(content, dict | list):
+                dump_playbook(content, f)
+            else:
+                f.write(content)
+        invalidate_playbook_cache()
+        return _dumps_compact(
             {
                 "success": True,
                 "path": str(playbook_path),
@@ -434,7 +609,7 @@ def create_playbook(
             }
         )
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps_compact({"error": str(e)})
 
 
 # ============================================================================
@@ -464,7 +639,7 @@ def register_project(
     Returns:
         Registration result
     """
-    global config
+    config = get_config()
 
     project = ProjectDefinition(
         name=name,
@@ -481,7 +656,7 @@ def register_project(
 
     save_config(config)
 
-    return json.dumps(
+    return _dumps_compact(
         {
             "success": True,
             "project": name,
@@ -498,6 +673,7 @@ def list_projects() -> str:
     Returns:
         JSON with all projects
     """
+    config = get_config()
     projects_data = {}
 
     for name, proj in config.projects.items():
@@ -507,13 +683,12 @@ def list_projects() -> str:
             "is_default": name == config.default_project,
         }
 
-    return json.dumps(
+    return _dumps(
         {
             "projects": projects_data,
             "default": config.default_project,
             "total": len(config.projects),
         },
-        indent=2,
     )
 
 
@@ -529,21 +704,20 @@ def project_playbooks(
     Returns:
         List of playbook files
     """
-    proj = resolve_project(config, project)
+    proj = resolve_project(get_config(), project)
 
     if not proj:
-        return json.dumps({"error": "No project specified or found"})
+        return _dumps_compact({"error": "No project specified or found"})
 
     playbooks = discover_playbooks(proj.root)
 
-    return json.dumps(
+    return _dumps(
         {
             "project": proj.name,
             "root": proj.root,
             "playbooks": playbooks,
             "total": len(playbooks),
         },
-        indent=2,
     )
 
 
@@ -552,6 +726,42 @@ def project_playbooks(
 # ============================================================================
 
 
+def _run_vault(
+    cmd: list[str], ctx: ToolContext, vault_password: str | None
+) -> tuple[int, str, str]:
+    """Run an ansible-vault command, passing the password through a pipe.
+
+    The password is written to an anonymous pipe whose read end is handed
+    to ansible-vault as ``/dev/fd/N``, so it never touches the filesystem.
+
+    Args:
+        cmd: ansible-vault command and arguments
+        ctx: Resolved tool context
+        vault_password: Vault password (optional)
+
+    Returns:
+        Tuple of (return_code, stdout, stderr)
+    """
+    if not vault_password:
+        return run_command(cmd, cwd=ctx.cwd, env=ctx.env)
+
+    read_fd, write_fd = os.pipe()
+    try:
+        try:
+            os.write(write_fd, vault_password.encode())
+        finally:
+            os.close(write_fd)
+
+        return run_command(
+            [*cmd, "--vault-password-file", f"/dev/fd/{read_fd}"],
+            cwd=ctx.cwd,
+            env=ctx.env,
+            pass_fds=(read_fd,),
+        )
+    finally:
+        os.close(read_fd)
+
+
 @mcp.tool()
 def vault_encrypt(
     file_path: str,
@@ -570,28 +780,16 @@ def vault_encrypt(
     Returns:
         Encryption result
     """
-    proj = resolve_project(config, project)
-    cwd = proj.root if proj else None
-    env = project_env(proj) if proj else os.environ.copy()
+    ctx = _tool_context(project)
 
     cmd = ["ansible-vault", "encrypt", file_path]
 
-    # Handle vault password
-    if vault_password:
-        with tempfile.NamedTemporaryFile(mode="w", delete=False) as f:
-            f.write(vault_password)
-            password_file = f.name
-        cmd.extend(["--vault-password-file", password_file])
-    elif vault_id:
+    if vault_id and not vault_password:
         cmd.extend(["--vault-id", vault_id])
 
-    rc, stdout, stderr = run_command(cmd, cwd=cwd, env=env)
+    rc, stdout, stderr = _run_vault(cmd, ctx, vault_password)
 
-    # Clean up temp password file
-    if vault_password:
-        os.unlink(password_file)
-
-    return json.dumps(
+    return _dumps_compact(
         {
             "success": rc == 0,
             "stdout": stdout,
@@ -618,26 +816,16 @@ def vault_decrypt(
     Returns:
         Decryption result
     """
-    proj = resolve_project(config, project)
-    cwd = proj.root if proj else None
-    env = project_env(proj) if proj else os.environ.copy()
+    ctx = _tool_context(project)
 
     cmd = ["ansible-vault", "decrypt", file_path]
 
-    if vault_password:
-        with tempfile.NamedTemporaryFile(mode="w", delete=False) as f:
-            f.write(vault_password)
-            password_file = f.name
-        cmd.extend(["--vault-password-file", password_file])
-    elif vault_id:
+    if vault_id and not vault_password:
         cmd.extend(["--vault-id", vault_id])
 
-    rc, stdout, stderr = run_command(cmd, cwd=cwd, env=env)
-
-    if vault_password:
-        os.unlink(password_file)
+    rc, stdout, stderr = _run_vault(cmd, ctx, vault_password)
 
-    return json.dumps(
+    return _dumps_compact(
         {
             "success": rc == 0,
             "stdout": stdout,
@@ -662,25 +850,14 @@ def vault_view(
     Returns:
         File contents
     """
-    proj = resolve_project(config, project)
-    cwd = proj.root if proj else None
-    env = project_env(proj) if proj else os.environ.copy()
+    ctx = _tool_context(project)
 
     cmd = ["ansible-vault", "view", file_path]
 
-    if vault_password:
-        with tempfile.NamedTemporaryFile(mode="w", delete=False) as f:
-            f.write(vault_password)
-            password_file = f.name
-        cmd.extend(["--vault-password-file", password_file])
-
-    rc, stdout, stderr = run_command(cmd, cwd=cwd, env=env)
-
-    if vault_password:
-        os.unlink(password_file)
+    rc, stdout, stderr = _run_vault(cmd, ctx, vault_password)
 
     if rc != 0:
-        return json.dumps({"error": stderr})
+        return _dumps_compact({"error": stderr})
 
     return stdout
 
@@ -706,23 +883,20 @@ def galaxy_install(
     Returns:
         Installation results
     """
-    proj = resolve_project(config, project)
-    cwd = proj.root if proj else None
-    env = project_env(proj) if proj else None
+    ctx = _tool_context(project)
 
     cmd = ["ansible-galaxy", "install", "-r", requirements_file]
     if force:
         cmd.append("--force")
 
-    rc, stdout, stderr = run_command(cmd, cwd=cwd, env=env)
+    rc, stdout, stderr = run_command(cmd, cwd=ctx.cwd, env=ctx.env)
 
-    return json.dumps(
+    return _dumps_compact(
         {
             "success": rc == 0,
             "stdout": stdout,
             "stderr": stderr,
         },
-        indent=2,
     )
 
 
@@ -731,36 +905,55 @@ def galaxy_install(
 # ============================================================================
 
 
-@mcp.tool()
-def ansible_gather_facts(
-    hosts: str = "all",
+def _gather_facts_raw(
+    hosts: str,
     filter_pattern: str | None = None,
     inventory: str | None = None,
     project: str | None = None,
-) -> str:
-    """Gather system facts from hosts.
+) -> dict[str, Any]:
+    """Run the setup module and return the unserialized result.
 
     Args:
-        hosts: Host pattern (default: all)
+        hosts: Host pattern
         filter_pattern: Fact filter pattern (optional)
         inventory: Inventory path (optional)
         project: Project name (optional)
 
     Returns:
-        Gathered facts
+        Dictionary with return_code, stdout, stderr and success
     """
     args = {}
     if filter_pattern:
         args["filter"] = filter_pattern
 
-    result = ansible_task(  # type: ignore[operator]
+    return _ansible_task_raw(
         hosts=hosts,
         module="setup",
         args=args if args else None,
         inventory=inventory,
         project=project,
     )
-    return str(result)
+
+
+@mcp.tool()
+def ansible_gather_facts(
+    hosts: str = "all",
+    filter_pattern: str | None = None,
+    inventory: str | None = None,
+    project: str | None = None,
+) -> str:
+    """Gather system facts from hosts.
+
+    Args:
+        hosts: Host pattern (default: all)
+        filter_pattern: Fact filter pattern (optional)
+        inventory: Inventory path (optional)
+        project: Project name (optional)
+
+    Returns:
+        Gathered facts
+    """
+    return _dumps_compact(_gather_facts_raw(hosts, filter_pattern, inventory, project))
 
 
 @mcp.tool()
@@ -779,41 +972,27 @@ def ansible_diagnose_host(
     Returns:
         Diagnostic results with health score
     """
-    # Gather facts
-    facts_result = str(
-        ansible_gather_facts(  # type: ignore[operator]
-            hosts=hostname,
-            inventory=inventory,
-            project=project,
-        )
-    )
-
-    try:
-        facts_data = json.loads(facts_result)
-
-        # Parse stdout to extract metrics
-        metrics = {
-            "cpu_usage": 0,
-            "memory_usage": 0,
-            "disk_usage": 0,
-            "failed_services": 0,
-        }
+    facts_data = _gather_facts_raw(hostname, inventory=inventory, project=project)
 
-        # Calculate health score
-        health_score = calculate_health_score(metrics)
+    # Parse stdout to extract metrics
+    metrics = {
+        "cpu_usage": 0,
+        "memory_usage": 0,
+        "disk_usage": 0,
+        "failed_services": 0,
+    }
 
-        return json.dumps(
-            {
-                "hostname": hostname,
-                "health_score": health_score,
-                "facts": facts_data,
-                "metrics": metrics,
-            },
-            indent=2,
-        )
+    # Calculate health score
+    health_score = calculate_health_score(metrics)
 
-    except json.JSONDecodeError:
-        return facts_result
+    return _dumps(
+        {
+            "hostname": hostname,
+            "health_score": health_score,
+            "facts": facts_data,
+            "metrics": metrics,
+        },
+    )
 
 
 @mcp.tool()
@@ -836,15 +1015,16 @@ def ansible_service_manager(
     Returns:
         Service management results
     """
-    result = ansible_task(  # type: ignore[operator]
-        hosts=hosts,
-        module="systemd",
-        args={"name": service, "state": state},
-        inventory=inventory,
-        become=True,
-        project=project,
+    return _dumps_compact(
+        _ansible_task_raw(
+            hosts=hosts,
+            module="systemd",
+            args={"name": service, "state": state},
+            inventory=inventory,
+            become=True,
+            project=project,
+        )
     )
-    return str(result)
 
 
 def main():
@@ -1,29 +1,117 @@
 """Utility functions for Ansible MCP Server."""
 
-import hashlib
-import json
+import functools
+import os
+import re
+import signal
 import subprocess  # nosec B404 - Required for running Ansible CLI commands
 import tempfile
-from datetime import datetime
-from pathlib import Path
-from typing import Any
+import threading
+import time
+from typing import IO, Any
 
+import orjson
 import yaml
 
+from ansible_mcp_server.config import FullEnv, base_env
+
+# Prefer the libyaml-backed emitter, falling back to pure Python without it
+try:
+    from yaml import CSafeDumper as _SafeDumper
+except ImportError:  # pragma: no cover - depends on how PyYAML was built
+    from yaml import SafeDumper as _SafeDumper  # type: ignore[assignment]
+
+# Ansible spelling of boolean module argument values
+_BOOL_ARG = {True: "true", False: "false"}
+
+# Characters that force a module argument value to be quoted
+_NEEDS_QUOTE = re.compile(r"[\s'\"]")
+
+# Common log timestamp formats, combined so a line is scanned only once;
+# ASCII-only so non-ASCII digits are never taken for part of a timestamp
+_TIMESTAMP_RE = re.compile(
+    r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}"  # ISO format
+    r"|\d{2}/[A-Za-z]{3}/\d{4}:\d{2}:\d{2}:\d{2}"  # Apache format
+    r"|[A-Za-z]{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}",  # Syslog format
+    re.ASCII,
+)
+
+
+def _child_env(env: dict[str, str] | None) -> dict[str, str]:
+    """Layer environment overrides on top of the server environment.
+
+    Children always get the startup snapshot from base_env(), never the
+    live os.environ, whether or not there are overrides. A FullEnv, such as
+    a cached project_env(), is already complete and passed through as is.
+
+    Args:
+        env: Environment variable overrides, or a complete FullEnv
+
+    Returns:
+        Full environment for a child process
+    """
+    if isinstance(env, FullEnv):
+        return env
+    return {**base_env(), **env} if env else base_env()
+
+
+def _kill_process_group(process: subprocess.Popen) -> None:
+    """Kill a child started in its own session along with its descendants.
+
+    Ansible forks SSH and worker processes that would otherwise keep the
+    output pipes open after the direct child is gone.
+
+    Args:
+        process: Process started with start_new_session=True
+    """
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (AttributeError, OSError):
+        # No process groups on this platform, or the group already exited
+        process.kill()
+
 
 def run_command(
     cmd: list[str],
     cwd: str | None = None,
     env: dict[str, str] | None = None,
     timeout: int = 300,
+    pass_fds: tuple[int, ...] = (),
 ) -> tuple[int, str, str]:
     """Run a command and return output.
 
     Args:
         cmd: Command and arguments as list
         cwd: Working directory
-        env: Environment variables
+        env: Environment variables added on top of the server environment
         timeout: Command timeout in seconds
+        pass_fds: File descriptors to keep open in the child
+
+    Returns:
+        Tuple of (return_code, stdout, stderr)
+    """
+    rc, stdout, stderr = run_command_bytes(cmd, cwd, env, timeout, pass_fds)
+    return rc, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
+
+def run_command_bytes(
+    cmd: list[str],
+    cwd: str | None = None,
+    env: dict[str, str] | None = None,
+    timeout: int = 300,
+    pass_fds: tuple[int, ...] = (),
+) -> tuple[int, bytes, bytes]:
+    """Run a command and return its raw, undecoded output.
+
+    Useful when stdout goes straight into a parser that accepts bytes, such
+    as orjson, so the output is not decoded to str first.
+
+    Args:
+        cmd: Command and arguments as list
+        cwd: Working directory
+        env: Environment variables added on top of the server environment
+        timeout: Command timeout in seconds
+        pass_fds: File descriptors to keep open in the child
 
     Returns:
         Tuple of (return_code, stdout, stderr)
@@ -35,18 +123,22 @@ def run_command(
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             cwd=cwd,
-            env=env,
-            text=True,
+            env=_child_env(env),
+            pass_fds=pass_fds,
+            start_new_session=True,
         )
 
-        stdout, stderr = process.communicate(timeout=timeout)
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            _kill_process_group(process)
+            process.communicate()
+            return -1, b"", f"Command timed out after {timeout} seconds".encode()
+
         return process.returncode, stdout, stderr
 
-    except subprocess.TimeoutExpired:
-        process.kill()
-        return -1, "", f"Command timed out after {timeout} seconds"
     except Exception as e:
-        return -1, "", str(e)
+        return -1, b"", str(e).encode()
 
 
 def serialize_playbook(playbook: Any) -> str:
@@ -58,7 +150,75 @@ def serialize_playbook(playbook: Any) -> str:
     Returns:
         YAML formatted string
     """
-    return yaml.dump(playbook, default_flow_style=False, sort_keys=False)
+    return yaml.dump(
+        playbook, Dumper=_SafeDumper, default_flow_style=False, sort_keys=False
+    )
+
+
+def dump_playbook(playbook: Any, stream: IO[str]) -> None:
+    """Write playbook object as YAML directly to an open text stream.
+
+    Args:
+        playbook: Playbook as dict or list
+        stream: Writable text stream
+    """
+    yaml.dump(
+        playbook,
+        stream,
+        Dumper=_SafeDumper,
+        default_flow_style=False,
+        sort_keys=False,
+    )
+
+
+def _escape_module_arg_char(match: re.Match[str]) -> str:
+    """Spell a whitespace or quote character as an escape Ansible decodes.
+
+    Args:
+        match: Match of a single character from _NEEDS_QUOTE
+
+    Returns:
+        Escape sequence for the character
+    """
+    code = ord(match.group())
+    return f"\\x{code:02x}" if code < 0x100 else f"\\u{code:04x}"
+
+
+def _format_module_arg(value: Any) -> str:
+    """Format a single module argument value for the key=value form.
+
+    Backslashes are escaped, and values containing whitespace or quotes are
+    quoted, so Ansible's key=value parser reads them back intact.
+
+    Args:
+        value: Module argument value
+
+    Returns:
+        String safe to place after ``key=``
+    """
+    # Exact type checks cover the common cases; isinstance catches subclasses
+    kind = type(value)
+    if kind is str:
+        text: str = value
+    elif kind is bool:
+        text = _BOOL_ARG[value]
+    elif kind is dict or kind is list or isinstance(value, dict | list):
+        text = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+    else:
+        text = str(value)
+
+    # Ansible decodes backslash escapes in key=value arguments
+    text = text.replace("\\", "\\\\")
+    if not _NEEDS_QUOTE.search(text):
+        return text
+
+    if text.endswith("\\"):
+        # A backslash right before the closing quote always reads as an
+        # escaped quote, so spell out the special characters instead
+        return _NEEDS_QUOTE.sub(_escape_module_arg_char, text)
+    if "'" not in text:
+        return f"'{text}'"
+    return '"' + text.replace('"', '\\"') + '"'
 
 
 def dict_to_module_args(args: dict[str, Any]) -> str:
@@ -70,14 +230,7 @@ def dict_to_module_args(args: dict[str, Any]) -> str:
     Returns:
         Space-separated key=value string
     """
-    parts = []
-    for key, value in args.items():
-        if isinstance(value, dict | list):
-            value = json.dumps(value)
-        elif isinstance(value, bool):
-            value = str(value).lower()
-        parts.append(f"{key}={value}")
-    return " ".join(parts)
+    return " ".join(f"{key}={_format_module_arg(value)}" for key, value in args.items())
 
 
 def split_paths(path_str: str | None) -> list[str]:
@@ -91,7 +244,7 @@ def split_paths(path_str: str | None) -> list[str]:
     """
     if not path_str:
         return []
-    return [p.strip() for p in path_str.split(":") if p.strip()]
+    return [s for p in path_str.split(":") if (s := p.strip())]
 
 
 def extract_hosts_from_inventory_json(
@@ -100,40 +253,111 @@ def extract_hosts_from_inventory_json(
     """Extract hosts and groups from ansible-inventory JSON output.
 
     Args:
-        inventory_data: Parsed JSON from ansible-inventory
+        inventory_data: Parsed JSON from ansible-inventory, ideally loaded
+            with orjson.loads straight from the command's stdout bytes
 
     Returns:
         Tuple of (hosts, groups)
     """
-    hosts = []
-    groups = []
-
     # Get all hosts from _meta.hostvars
-    if "_meta" in inventory_data and "hostvars" in inventory_data["_meta"]:
-        hosts = list(inventory_data["_meta"]["hostvars"].keys())
-
-    # Get all groups (excluding _meta)
-    for key in inventory_data.keys():
-        if key != "_meta" and isinstance(inventory_data[key], dict):
-            groups.append(key)
+    meta = inventory_data.get("_meta")
+    hosts = list(meta.get("hostvars") or ()) if meta else []
+
+    # Get all groups (excluding _meta); parsed JSON only produces plain dicts
+    groups = [
+        key
+        for key, value in inventory_data.items()
+        if key != "_meta" and type(value) is dict
+    ]
 
     return hosts, groups
 
 
+def group_index_from_inventory_json(inventory_data: dict) -> dict[str, list[str]]:
+    """Map each host to the groups that list it directly.
+
+    Built in a single pass so lookups are a dict access instead of a scan
+    over every group's host list.
+
+    Args:
+        inventory_data: Parsed JSON from ansible-inventory
+
+    Returns:
+        Dictionary of hostname to group names
+    """
+    index: dict[str, list[str]] = {}
+
+    for group_name, group_data in inventory_data.items():
+        if group_name == "_meta":
+            continue
+        for host in group_data.get("hosts", ()):
+            index.setdefault(host, []).append(group_name)
+
+    return index
+
+
+# Discovered playbooks are reused for at most this many seconds, so files
+# added below the directories whose mtime is checked still show up
+PLAYBOOK_CACHE_TTL = 10
+
+
 def discover_playbooks(root_dir: str) -> list[str]:
     """Discover all playbook files in a directory.
 
+    Results are cached until the root directory or one of its immediate
+    subdirectories is modified, and for at most PLAYBOOK_CACHE_TTL seconds
+    since changes deeper in the tree are not detected.
+
     Args:
         root_dir: Root directory to search
 
     Returns:
         List of playbook file paths
     """
-    playbooks = []
-    root_path = Path(root_dir)
+    return list(
+        _discover_playbooks_cached(
+            root_dir,
+            _root_mtime(root_dir),
+            int(time.monotonic() // PLAYBOOK_CACHE_TTL),
+        )
+    )
+
+
+def invalidate_playbook_cache() -> None:
+    """Drop all cached playbook discovery results."""
+    _discover_playbooks_cached.cache_clear()
+
+
+def _root_mtime(root_dir: str) -> int:
+    """Get the latest modification time of a directory and its subdirectories.
+
+    Only the directory itself and its immediate subdirectories are checked,
+    which keeps the check cheap compared to a full walk.
+
+    Args:
+        root_dir: Directory to check
+
+    Returns:
+        Modification time in nanoseconds, or -1 if the directory is missing
+    """
+    try:
+        mtime = os.stat(root_dir).st_mtime_ns
+        with os.scandir(root_dir) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    mtime = max(mtime, entry.stat(follow_symlinks=False).st_mtime_ns)
+    except OSError:
+        return -1
+
+    return mtime
+
 
-    # Directories to exclude
-    exclude_dirs = {
+# File name suffixes treated as playbooks
+_PLAYBOOK_SUFFIXES = (".yml", ".yaml")
+
+# Directories never searched for playbooks
+_EXCLUDED_DIRS = frozenset(
+    {
         ".git",
         "group_vars",
         "host_vars",
@@ -142,23 +366,53 @@ def discover_playbooks(root_dir: str) -> list[str]:
         "venv",
         ".venv",
         "__pycache__",
+        "node_modules",
     }
+)
+
+
+@functools.lru_cache(maxsize=16)
+def _discover_playbooks_cached(
+    root_dir: str, mtime: int, ttl_bucket: int
+) -> tuple[str, ...]:
+    """Walk a directory for playbook files.
+
+    Args:
+        root_dir: Root directory to search
+        mtime: Directory modification time, only used as part of the cache key
+        ttl_bucket: Current PLAYBOOK_CACHE_TTL time window, only used as part
+            of the cache key
 
-    for yml_file in root_path.rglob("*.yml"):
-        if yml_file.is_file():
-            # Skip if in excluded directory
-            if any(excluded in yml_file.parts for excluded in exclude_dirs):
-                continue
-            playbooks.append(str(yml_file.relative_to(root_path)))
+    Returns:
+        Tuple of playbook file paths
+    """
+    playbooks: list[str] = []
 
-    for yaml_file in root_path.rglob("*.yaml"):
-        if yaml_file.is_file():
-            # Skip if in excluded directory
-            if any(excluded in yaml_file.parts for excluded in exclude_dirs):
-                continue
-            playbooks.append(str(yaml_file.relative_to(root_path)))
+    def walk(directory: str, rel: str) -> None:
+        # Single pass over each directory; excluded trees are never entered
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            return
 
-    return sorted(playbooks)
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in _EXCLUDED_DIRS:
+                        continue
+                    walk(entry.path, rel + entry.name + os.sep)
+                elif entry.name.endswith(_PLAYBOOK_SUFFIXES) and entry.is_file():
+                    playbooks.append(rel + entry.name)
+
+    walk(root_dir, "")
+
+    playbooks.sort()
+    return tuple(playbooks)
+
+
+# Last timestamp handed out by generate_snapshot_id
+_SNAPSHOT_LOCK = threading.Lock()
+_last_snapshot_ns = 0
 
 
 def generate_snapshot_id() -> str:
@@ -167,25 +421,49 @@ def generate_snapshot_id() -> str:
     Returns:
         Unique snapshot identifier
     """
-    timestamp = datetime.now().isoformat()
-    hash_input = f"{timestamp}".encode()
-    hash_digest = hashlib.sha256(hash_input).hexdigest()[:8]
-    return f"snapshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{hash_digest}"
+    global _last_snapshot_ns
 
+    # Nanosecond clock, forced strictly increasing so IDs stay unique even
+    # when the clock is coarse or called twice within one tick
+    with _SNAPSHOT_LOCK:
+        now_ns = max(time.time_ns(), _last_snapshot_ns + 1)
+        _last_snapshot_ns = now_ns
 
-def create_temp_file(content: str, suffix: str = ".txt") -> str:
+    stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(now_ns // 1_000_000_000))
+    return f"snapshot_{stamp}_{now_ns & 0xFFFFFFFF:08x}"
+
+
+def create_temp_file(content: str | bytes, suffix: str = ".txt") -> str:
     """Create a temporary file with content.
 
     Args:
-        content: File content
+        content: File content, encoded as UTF-8 if given as str
         suffix: File suffix
 
     Returns:
         Path to temporary file
     """
-    with tempfile.NamedTemporaryFile(mode="w", suffix=suffix, delete=False) as f:
-        f.write(content)
-        return f.name
+    data = memoryview(content.encode() if isinstance(content, str) else content)
+
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        # Write straight to the descriptor, looping in case of short writes
+        while data:
+            data = data[os.write(fd, data) :]
+    finally:
+        os.close(fd)
+
+    return path
+
+
+# Health score thresholds (percent usage) and the points each one costs
+_CPU_CRITICAL, _CPU_CRITICAL_PENALTY = 90, 30
+_CPU_WARNING, _CPU_WARNING_PENALTY = 70, 15
+_MEM_CRITICAL, _MEM_CRITICAL_PENALTY = 90, 30
+_MEM_WARNING, _MEM_WARNING_PENALTY = 80, 15
+_DISK_CRITICAL, _DISK_CRITICAL_PENALTY = 95, 25
+_DISK_WARNING, _DISK_WARNING_PENALTY = 85, 10
+_FAILED_SERVICE_PENALTY = 10
 
 
 def calculate_health_score(metrics: dict[str, Any]) -> int:
@@ -197,32 +475,36 @@ def calculate_health_score(metrics: dict[str, Any]) -> int:
     Returns:
         Health score (0-100)
     """
-    score = 100
-
-    # CPU usage
     cpu_usage = int(metrics.get("cpu_usage", 0))
-    if cpu_usage > 90:
-        score -= 30
-    elif cpu_usage > 70:
-        score -= 15
-
-    # Memory usage
     mem_usage = int(metrics.get("memory_usage", 0))
-    if mem_usage > 90:
-        score -= 30
-    elif mem_usage > 80:
-        score -= 15
-
-    # Disk usage
     disk_usage = int(metrics.get("disk_usage", 0))
-    if disk_usage > 95:
-        score -= 25
-    elif disk_usage > 85:
-        score -= 10
-
-    # Failed services
     failed_services = int(metrics.get("failed_services", 0))
-    score -= failed_services * 10
+
+    score = (
+        100
+        - (
+            _CPU_CRITICAL_PENALTY
+            if cpu_usage > _CPU_CRITICAL
+            else _CPU_WARNING_PENALTY
+            if cpu_usage > _CPU_WARNING
+            else 0
+        )
+        - (
+            _MEM_CRITICAL_PENALTY
+            if mem_usage > _MEM_CRITICAL
+            else _MEM_WARNING_PENALTY
+            if mem_usage > _MEM_WARNING
+            else 0
+        )
+        - (
+            _DISK_CRITICAL_PENALTY
+            if disk_usage > _DISK_CRITICAL
+            else _DISK_WARNING_PENALTY
+            if disk_usage > _DISK_WARNING
+            else 0
+        )
+        - failed_services * _FAILED_SERVICE_PENALTY
+    )
 
     return max(0, min(100, score))
 
@@ -236,17 +518,7 @@ def parse_log_timestamp(line: str) -> str | None:
     Returns:
         Timestamp string if found, None otherwise
     """
-    import re
-
-    # Common timestamp patterns
-    patterns = [
-        r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}",  # ISO format
-        r"\d{2}/\w{3}/\d{4}:\d{2}:\d{2}:\d{2}",  # Apache format
-        r"\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}",  # Syslog format
-    ]
-
-    for pattern in patterns:
-        if match := re.search(pattern, line):
-            return match.group(0)
+    if match := _TIMESTAMP_RE.search(line):
+        return match.group(0)
 
     return None
@@ -1,13 +1,21 @@
 """Tests for configuration module."""
 
+import os
 import tempfile
 from pathlib import Path
 
+import pytest
+
 from ansible_mcp_server.config import (
     ProjectDefinition,
     ServerConfiguration,
+    get_config,
+    invalidate_env_cache,
     load_config,
     project_env,
+    project_env_overlay,
+    refresh_environment,
+    reload_config,
     resolve_project,
     save_config,
 )
@@ -104,6 +112,128 @@ class TestConfigPersistence:
                 del os.environ["MCP_ANSIBLE_CONFIG"]
             Path(temp_path).unlink(missing_ok=True)
 
+    def test_non_ascii_values_round_trip(self, tmp_path, monkeypatch):
+        """Test non-ASCII values are written and read back as UTF-8."""
+        config_file = tmp_path / "config.json"
+        monkeypatch.setenv("MCP_ANSIBLE_CONFIG", str(config_file))
+        project = ProjectDefinition(
+            name="caf\u00e9", root="/srv/caf\u00e9", env_vars={"GREETING": "h\u00e9"}
+        )
+
+        save_config(ServerConfiguration(projects={"caf\u00e9": project}))
+
+        assert "\u00e9".encode() in config_file.read_bytes()
+        loaded = load_config().projects["caf\u00e9"]
+        assert loaded.root == "/srv/caf\u00e9"
+        assert loaded.env_vars == {"GREETING": "h\u00e9"}
+
+    def test_save_keeps_file_mode(self, tmp_path, monkeypatch):
+        """Test rewriting the configuration preserves its permissions."""
+        config_file = tmp_path / "config.json"
+        monkeypatch.setenv("MCP_ANSIBLE_CONFIG", str(config_file))
+        save_config(ServerConfiguration())
+        config_file.chmod(0o600)
+
+        save_config(ServerConfiguration(default_project="other"))
+
+        assert config_file.stat().st_mode & 0o777 == 0o600
+
+    def test_new_file_uses_umask_mode(self, tmp_path, monkeypatch):
+        """Test a newly created configuration gets the usual umask mode."""
+        config_file = tmp_path / "config.json"
+        monkeypatch.setenv("MCP_ANSIBLE_CONFIG", str(config_file))
+        umask = os.umask(0)
+        os.umask(umask)
+
+        save_config(ServerConfiguration())
+
+        assert config_file.stat().st_mode & 0o777 == 0o666 & ~umask
+
+    def test_failed_save_leaves_no_temp_file(self, tmp_path, monkeypatch):
+        """Test a failed write removes the temporary file and keeps the old one."""
+        config_file = tmp_path / "config.json"
+        monkeypatch.setenv("MCP_ANSIBLE_CONFIG", str(config_file))
+        save_config(ServerConfiguration(default_project="kept"))
+
+        def fail_replace(src, dst):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(os, "replace", fail_replace)
+        with pytest.raises(OSError):
+            save_config(ServerConfiguration(default_project="lost"))
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["config.json"]
+        assert load_config().default_project == "kept"
+
+    def test_save_writes_through_symlink(self, tmp_path, monkeypatch):
+        """Test a symlinked configuration keeps the link and updates the target."""
+        target = tmp_path / "dotfiles" / "config.json"
+        target.parent.mkdir()
+        target.write_text("{}")
+        link = tmp_path / "config.json"
+        link.symlink_to(target)
+        monkeypatch.setenv("MCP_ANSIBLE_CONFIG", str(link))
+
+        save_config(ServerConfiguration(default_project="linked"))
+
+        assert link.is_symlink()
+        assert load_config().default_project == "linked"
+        assert sorted(p.name for p in target.parent.iterdir()) == ["config.json"]
+
+    def test_save_leaves_other_temp_files_alone(self, tmp_path, monkeypatch):
+        """Test saving never touches an unrelated file named like a temp file."""
+        monkeypatch.setenv("MCP_ANSIBLE_CONFIG", str(tmp_path / "config.json"))
+        (tmp_path / "config.json.tmp").write_text("mine")
+
+        save_config(ServerConfiguration())
+
+        assert (tmp_path / "config.json.tmp").read_text() == "mine"
+
+
+class TestConfigCache:
+    """Test cases for cached configuration access."""
+
+    def test_get_config_reuses_cached_object(self, tmp_path, monkeypatch):
+        """Test repeated access returns the same object while file is unchanged."""
+        monkeypatch.setenv("MCP_ANSIBLE_CONFIG", str(tmp_path / "config.json"))
+        save_config(
+            ServerConfiguration(
+                projects={"test": ProjectDefinition(name="test", root="/test")}
+            )
+        )
+
+        first = get_config()
+        second = get_config()
+
+        assert first is second
+        assert "test" in first.projects
+
+    def test_get_config_reloads_on_change(self, tmp_path, monkeypatch):
+        """Test configuration is reloaded when the file changes on disk."""
+        config_file = tmp_path / "config.json"
+        monkeypatch.setenv("MCP_ANSIBLE_CONFIG", str(config_file))
+        save_config(ServerConfiguration())
+
+        assert len(get_config().projects) == 0
+
+        config_file.write_text('{"projects": {"other": {"root": "/other"}}}')
+        os.utime(config_file, ns=(0, 0))
+
+        assert "other" in get_config().projects
+
+    def test_get_config_follows_config_env(self, tmp_path, monkeypatch):
+        """Test changing MCP_ANSIBLE_CONFIG switches the configuration file."""
+        first_file = tmp_path / "first.json"
+        second_file = tmp_path / "second.json"
+        first_file.write_text('{"projects": {"first": {"root": "/first"}}}')
+        second_file.write_text('{"projects": {"second": {"root": "/second"}}}')
+
+        monkeypatch.setenv("MCP_ANSIBLE_CONFIG", str(first_file))
+        assert "first" in reload_config().projects
+
+        monkeypatch.setenv("MCP_ANSIBLE_CONFIG", str(second_file))
+        assert "second" in get_config().projects
+
 
 class TestProjectResolution:
     """Test cases for project resolution."""
@@ -141,6 +271,28 @@ class TestProjectResolution:
         assert resolved is not None
         assert resolved.name == "test"
 
+    def test_resolve_env_project(self, monkeypatch):
+        """Test MCP_ANSIBLE_PROJECT_NAME overrides the default project."""
+        config = ServerConfiguration(
+            projects={
+                "first": ProjectDefinition(name="first", root="/first"),
+                "second": ProjectDefinition(name="second", root="/second"),
+            },
+            default_project="first",
+        )
+
+        monkeypatch.setenv("MCP_ANSIBLE_PROJECT_NAME", "second")
+        refresh_environment()
+
+        try:
+            resolved = resolve_project(config)
+        finally:
+            monkeypatch.delenv("MCP_ANSIBLE_PROJECT_NAME")
+            refresh_environment()
+
+        assert resolved is not None
+        assert resolved.name == "second"
+
     def test_resolve_no_project(self):
         """Test resolving with no projects."""
         config = ServerConfiguration()
@@ -187,3 +339,82 @@ class TestProjectEnv:
 
         assert "CUSTOM_VAR" in env
         assert env["CUSTOM_VAR"] == "value"
+
+    def test_env_overlay_only_has_project_vars(self):
+        """Test the overlay holds only what the project adds."""
+        project = ProjectDefinition(
+            name="overlay",
+            root="/test",
+            roles_path=["roles"],
+            env_vars={"CUSTOM_VAR": "value"},
+        )
+
+        overlay = project_env_overlay(project)
+
+        assert overlay == {"ANSIBLE_ROLES_PATH": "roles", "CUSTOM_VAR": "value"}
+
+    def test_env_overlay_is_cached(self):
+        """Test repeated calls reuse the built overlay."""
+        project = ProjectDefinition(name="cached", root="/test")
+
+        assert project_env_overlay(project) is project_env_overlay(project)
+
+    def test_env_with_forwarded_vars(self, monkeypatch):
+        """Test MCP_ANSIBLE_ENV_* variables are forwarded after a refresh."""
+        project = ProjectDefinition(name="forwarded", root="/test")
+        project_env(project)
+
+        monkeypatch.setenv("MCP_ANSIBLE_ENV_ANSIBLE_FORKS", "20")
+        refresh_environment()
+
+        try:
+            assert project_env(project)["ANSIBLE_FORKS"] == "20"
+        finally:
+            monkeypatch.delenv("MCP_ANSIBLE_ENV_ANSIBLE_FORKS")
+            refresh_environment()
+
+    def test_env_is_cached(self):
+        """Test repeated calls reuse the built environment."""
+        project = ProjectDefinition(name="cached-env", root="/test")
+
+        assert project_env(project) is project_env(project)
+
+    def test_env_follows_project_changes(self):
+        """Test a changed project rebuilds its cached environment."""
+        project = ProjectDefinition(name="changed", root="/test")
+        project_env(project)
+
+        project.env_vars["CUSTOM_VAR"] = "value"
+
+        assert project_env(project)["CUSTOM_VAR"] == "value"
+
+    def test_env_follows_path_changes(self):
+        """Test changed path lists rebuild the cached environment."""
+        project = ProjectDefinition(name="paths", root="/test", roles_path=["roles"])
+        project_env(project)
+
+        project.roles_path.append("/usr/share/ansible/roles")
+        project.collections_paths = ["collections"]
+
+        env = project_env(project)
+        assert env["ANSIBLE_ROLES_PATH"] == "roles:/usr/share/ansible/roles"
+        assert env["ANSIBLE_COLLECTIONS_PATH"] == "collections"
+
+    def test_save_config_invalidates_env(self, tmp_path, monkeypatch):
+        """Test saving the configuration drops cached environments."""
+        monkeypatch.setenv("MCP_ANSIBLE_CONFIG", str(tmp_path / "config.json"))
+        project = ProjectDefinition(name="saved", root="/test")
+        env = project_env(project)
+
+        save_config(ServerConfiguration(projects={"saved": project}))
+
+        assert project_env(project) is not env
+
+    def test_invalidate_env_cache(self):
+        """Test invalidation forces a rebuild."""
+        project = ProjectDefinition(name="invalidated", root="/test")
+        overlay = project_env_overlay(project)
+
+        invalidate_env_cache()
+
+        assert project_env_overlay(project) is not overlay
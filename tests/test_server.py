@@ -0,0 +1,218 @@
+"""Tests for server module."""
+
+import json
+import os
+
+import pytest
+import yaml
+
+from ansible_mcp_server import server
+from ansible_mcp_server.config import (
+    FullEnv,
+    ProjectDefinition,
+    ServerConfiguration,
+    base_env,
+    save_config,
+)
+
+INVENTORY = {
+    "_meta": {"hostvars": {"web01": {"ansible_host": "10.0.0.1"}}},
+    "all": {"children": ["ungrouped", "webservers"]},
+    "webservers": {"hosts": ["web01"]},
+    "ungrouped": {},
+}
+
+
+@pytest.fixture
+def inventory_file(tmp_path):
+    """Create an inventory file and start from an empty inventory cache."""
+    path = tmp_path / "hosts.ini"
+    path.write_text("[webservers]\nweb01\n")
+    server._INVENTORY_CACHE.clear()
+    yield path
+    server._INVENTORY_CACHE.clear()
+
+
+@pytest.fixture
+def fake_inventory(monkeypatch):
+    """Replace ansible-inventory with a canned result and record calls."""
+    calls = []
+    result = [0, json.dumps(INVENTORY).encode(), b""]
+
+    def run(cmd, cwd=None, env=None, **kwargs):
+        calls.append((cmd, env))
+        return tuple(result)
+
+    monkeypatch.setattr(server, "run_command_bytes", run)
+    return calls, result
+
+
+class TestToolContext:
+    """Test cases for tool context resolution."""
+
+    def test_project_env_is_full_and_cached(self, tmp_path, monkeypatch):
+        """Test contexts carry the cached, complete project environment."""
+        monkeypatch.setenv("MCP_ANSIBLE_CONFIG", str(tmp_path / "config.json"))
+        save_config(
+            ServerConfiguration(
+                projects={"web": ProjectDefinition(name="web", root=str(tmp_path))}
+            )
+        )
+
+        first = server._tool_context("web")
+        second = server._tool_context("web")
+
+        assert isinstance(first.env, FullEnv)
+        assert first.env is second.env
+        assert first.env.items() >= base_env().items()
+
+
+class TestInventoryCache:
+    """Test cases for the shared inventory snapshot."""
+
+    def test_find_host_reuses_inventory_listing(self, inventory_file, fake_inventory):
+        """Test a host lookup after listing does not run ansible-inventory again."""
+        calls, _ = fake_inventory
+
+        listing = json.loads(server.ansible_inventory(inventory=str(inventory_file)))
+        found = json.loads(
+            server.inventory_find_host("web01", inventory=str(inventory_file))
+        )
+
+        assert listing["hosts"] == ["web01"]
+        assert found["groups"] == ["webservers"]
+        assert len(calls) == 1
+
+    def test_group_index_built_once(self, inventory_file, fake_inventory, monkeypatch):
+        """Test repeated host lookups reuse the snapshot's group index."""
+        builds = []
+        real_index = server.group_index_from_inventory_json
+
+        def counting_index(data):
+            builds.append(data)
+            return real_index(data)
+
+        monkeypatch.setattr(server, "group_index_from_inventory_json", counting_index)
+
+        for hostname in ("web01", "web01", "missing"):
+            server.inventory_find_host(hostname, inventory=str(inventory_file))
+
+        assert len(builds) == 1
+
+    def test_reloads_when_inventory_changes(self, inventory_file, fake_inventory):
+        """Test editing the inventory file invalidates the snapshot."""
+        calls, _ = fake_inventory
+        server.ansible_inventory(inventory=str(inventory_file))
+
+        os.utime(inventory_file, ns=(0, 0))
+        server.ansible_inventory(inventory=str(inventory_file))
+
+        assert len(calls) == 2
+
+    def test_cache_is_bounded(self, tmp_path, fake_inventory, monkeypatch):
+        """Test only the most recently used inventories are kept."""
+        monkeypatch.setattr(server, "INVENTORY_CACHE_SIZE", 2)
+        server._INVENTORY_CACHE.clear()
+        paths = [tmp_path / f"hosts{i}.ini" for i in range(3)]
+        for path in paths:
+            path.write_text("web01\n")
+
+        for path in paths[:2]:
+            server._load_inventory(server._tool_context(None, str(path)))
+        server._load_inventory(server._tool_context(None, str(paths[0])))
+        server._load_inventory(server._tool_context(None, str(paths[2])))
+
+        cached = [key[0] for key in server._INVENTORY_CACHE]
+        assert cached == [str(paths[0]), str(paths[2])]
+
+    def test_stale_entry_is_dropped(self, inventory_file, fake_inventory):
+        """Test a snapshot outliving its inventory is not kept after a failure."""
+        _, result = fake_inventory
+        ctx = server._tool_context(None, str(inventory_file))
+        server._load_inventory(ctx)
+
+        os.utime(inventory_file, ns=(0, 0))
+        result[:] = [2, b"", b"parse error"]
+        with pytest.raises(server.InventoryError):
+            server._load_inventory(ctx)
+
+        assert not server._INVENTORY_CACHE
+
+    def test_key_includes_project_env(self, inventory_file, fake_inventory):
+        """Test a changed project environment is not served a stale snapshot."""
+        calls, _ = fake_inventory
+        project = ProjectDefinition(name="inv", root=str(inventory_file.parent))
+        ctx = server.ToolContext(project, project.root, None, str(inventory_file))
+
+        server._load_inventory(ctx)
+        project.env_vars["ANSIBLE_FORKS"] = "20"
+        server._load_inventory(ctx)
+
+        assert len(calls) == 2
+
+    def test_failure_is_reported_and_not_cached(self, inventory_file, fake_inventory):
+        """Test ansible-inventory failures surface and are retried next time."""
+        calls, result = fake_inventory
+        result[:] = [2, b"", b"parse error"]
+
+        response = json.loads(server.ansible_inventory(inventory=str(inventory_file)))
+
+        assert response["stderr"] == "parse error"
+        assert response["return_code"] == 2
+
+        with pytest.raises(server.InventoryError):
+            server._load_inventory(server._tool_context(None, str(inventory_file)))
+        assert len(calls) == 2
+
+
+class TestCreatePlaybook:
+    """Test cases for playbook creation."""
+
+    @pytest.fixture(autouse=True)
+    def no_project(self, tmp_path, monkeypatch):
+        """Run without a configured project, rooted in a temp directory."""
+        monkeypatch.setenv("MCP_ANSIBLE_CONFIG", str(tmp_path / "config.json"))
+        monkeypatch.chdir(tmp_path)
+
+    def test_writes_yaml(self, tmp_path):
+        """Test structured content is written as YAML."""
+        playbook = [{"name": "play", "hosts": "all", "tasks": []}]
+
+        result = json.loads(server.create_playbook("site.yml", playbook))
+
+        assert result["success"] is True
+        text = (tmp_path / "site.yml").read_text()
+        assert text.startswith("- name: play\n")
+        assert yaml.safe_load(text) == playbook
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_failure_keeps_existing_playbook(self, tmp_path):
+        """Test a serialization error leaves the previous file intact."""
+        (tmp_path / "site.yml").write_text("- hosts: all\n")
+
+        result = json.loads(
+            server.create_playbook("site.yml", [{"hosts": "all", "vars": object()}])
+        )
+
+        assert "error" in result
+        assert (tmp_path / "site.yml").read_text() == "- hosts: all\n"
+        assert not list(tmp_path.glob(".site.yml.*"))
+
+    def test_writes_through_symlink(self, tmp_path):
+        """Test a symlinked playbook keeps the link and updates its target."""
+        (tmp_path / "shared").mkdir()
+        (tmp_path / "shared" / "site.yml").write_text("- hosts: all\n")
+        (tmp_path / "site.yml").symlink_to(tmp_path / "shared" / "site.yml")
+
+        server.create_playbook("site.yml", "- hosts: web\n")
+
+        assert (tmp_path / "site.yml").is_symlink()
+        assert (tmp_path / "shared" / "site.yml").read_text() == "- hosts: web\n"
+
+    def test_leaves_other_temp_files_alone(self, tmp_path):
+        """Test a user's own .tmp file next to the playbook is not touched."""
+        (tmp_path / "site.yml.tmp").write_text("notes\n")
+
+        server.create_playbook("site.yml", "- hosts: all\n")
+
+        assert (tmp_path / "site.yml.tmp").read_text() == "notes\n"
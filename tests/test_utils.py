@@ -0,0 +1,423 @@
+"""Tests for utility module."""
+
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+
+import pytest
+import yaml
+from ansible.parsing.splitter import parse_kv
+
+from ansible_mcp_server.config import FullEnv, base_env
+from ansible_mcp_server.utils import (
+    PLAYBOOK_CACHE_TTL,
+    _child_env,
+    _discover_playbooks_cached,
+    calculate_health_score,
+    create_temp_file,
+    dict_to_module_args,
+    discover_playbooks,
+    extract_hosts_from_inventory_json,
+    generate_snapshot_id,
+    group_index_from_inventory_json,
+    parse_log_timestamp,
+    run_command,
+    run_command_bytes,
+    serialize_playbook,
+    split_paths,
+)
+
+INVENTORY = {
+    "_meta": {
+        "hostvars": {
+            "web01": {"ansible_host": "10.0.0.1", "tags": {"role": "web"}},
+            "db01": {"ansible_host": "10.0.0.2"},
+        }
+    },
+    "all": {"children": ["ungrouped", "webservers", "databases"]},
+    "webservers": {"hosts": ["web01"], "vars": {"http_port": 80}},
+    "databases": {"hosts": ["db01"]},
+    "ungrouped": {},
+}
+
+
+class TestInventoryExtraction:
+    """Test cases for inventory host and group extraction."""
+
+    def test_extract_from_json(self):
+        """Test extracting hosts and groups from parsed inventory."""
+        hosts, groups = extract_hosts_from_inventory_json(INVENTORY)
+
+        assert hosts == ["web01", "db01"]
+        assert groups == ["all", "webservers", "databases", "ungrouped"]
+
+    def test_group_index(self):
+        """Test mapping hosts to the groups that contain them."""
+        inventory = {
+            **INVENTORY,
+            "production": {"hosts": ["web01", "db01"]},
+        }
+
+        index = group_index_from_inventory_json(inventory)
+
+        assert index["web01"] == ["webservers", "production"]
+        assert index["db01"] == ["databases", "production"]
+        assert "missing" not in index
+
+
+class TestRunCommand:
+    """Test cases for buffered command execution."""
+
+    def test_bytes_output(self):
+        """Test raw output is returned undecoded."""
+        rc, stdout, stderr = run_command_bytes(
+            [sys.executable, "-c", "import sys; sys.stdout.buffer.write(b'\\xff')"]
+        )
+
+        assert rc == 0
+        assert stdout == b"\xff"
+        assert stderr == b""
+
+    def test_text_output_replaces_invalid_utf8(self):
+        """Test undecodable output does not raise in the text variant."""
+        rc, stdout, _ = run_command(
+            [sys.executable, "-c", "import sys; sys.stdout.buffer.write(b'ok\\xff')"]
+        )
+
+        assert rc == 0
+        assert stdout == "ok\ufffd"
+
+    def test_environment_is_startup_snapshot(self, monkeypatch):
+        """Test children see the snapshot, not later os.environ changes."""
+        monkeypatch.setenv("MCP_TEST_LATE_VAR", "late")
+        code = "import os; print(os.environ.get('MCP_TEST_LATE_VAR', 'unset'))"
+
+        _, without_overrides, _ = run_command([sys.executable, "-c", code])
+        _, with_overrides, _ = run_command(
+            [sys.executable, "-c", code], env={"OTHER": "1"}
+        )
+
+        assert without_overrides.strip() == "unset"
+        assert with_overrides.strip() == "unset"
+
+    def test_full_env_passed_through(self):
+        """Test a complete environment is handed to the child unchanged."""
+        env = FullEnv(base_env(), MCP_TEST_FULL_ENV="1")
+
+        assert _child_env(env) is env
+        assert _child_env({"OTHER": "1"}) == {**base_env(), "OTHER": "1"}
+
+    def test_timeout(self):
+        """Test commands exceeding the timeout are reported as failures."""
+        rc, stdout, stderr = run_command(
+            [sys.executable, "-c", "import time; time.sleep(10)"], timeout=1
+        )
+
+        assert rc == -1
+        assert stdout == ""
+        assert "timed out" in stderr
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="POSIX process groups")
+    def test_timeout_kills_grandchildren(self):
+        """Test a timeout does not wait on descendants holding the pipes."""
+        start = time.monotonic()
+        rc, _, stderr = run_command(
+            [sys.executable, "-c", SPAWNS_GRANDCHILD], timeout=1
+        )
+
+        assert rc == -1
+        assert "timed out" in stderr
+        assert time.monotonic() - start < 10
+
+
+# Parent that leaves a grandchild holding its output pipes open
+SPAWNS_GRANDCHILD = (
+    "import subprocess, sys, time; "
+    "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)']); "
+    "time.sleep(30)"
+)
+
+
+class TestSerializePlaybook:
+    """Test cases for playbook serialization."""
+
+    def test_round_trip(self):
+        """Test serialized playbooks load back unchanged."""
+        playbook = [
+            {
+                "name": "Configure web",
+                "hosts": "webservers",
+                "become": True,
+                "tasks": [{"name": "Install nginx", "apt": {"name": "nginx"}}],
+            }
+        ]
+
+        assert yaml.safe_load(serialize_playbook(playbook)) == playbook
+
+    def test_preserves_key_order(self):
+        """Test keys are emitted in insertion order, not sorted."""
+        output = serialize_playbook({"name": "play", "hosts": "all"})
+
+        assert output.index("name:") < output.index("hosts:")
+
+    def test_matches_pure_python_dumper(self):
+        """Test the libyaml emitter produces the same text as the fallback."""
+        if not hasattr(yaml, "CSafeDumper"):
+            pytest.skip("PyYAML built without libyaml")
+        playbook = [
+            {
+                "name": "Deploy 'app'",
+                "hosts": "all",
+                "vars": {"empty": "", "ports": [80, 443], "ratio": 0.5},
+                "tasks": [{"shell": "echo $HOME: done"}],
+            }
+        ]
+
+        assert serialize_playbook(playbook) == yaml.dump(
+            playbook,
+            Dumper=yaml.SafeDumper,
+            default_flow_style=False,
+            sort_keys=False,
+        )
+
+
+class TestDiscoverPlaybooks:
+    """Test cases for playbook discovery."""
+
+    def test_finds_yml_and_yaml(self, tmp_path):
+        """Test both playbook suffixes are found and excluded dirs skipped."""
+        (tmp_path / "site.yml").write_text("---\n")
+        (tmp_path / "playbooks").mkdir()
+        (tmp_path / "playbooks" / "deploy.yaml").write_text("---\n")
+        (tmp_path / "roles" / "web" / "tasks").mkdir(parents=True)
+        (tmp_path / "roles" / "web" / "tasks" / "main.yml").write_text("---\n")
+        (tmp_path / "node_modules" / "pkg").mkdir(parents=True)
+        (tmp_path / "node_modules" / "pkg" / "config.yml").write_text("---\n")
+        (tmp_path / "README.md").write_text("docs\n")
+
+        assert discover_playbooks(str(tmp_path)) == [
+            "playbooks/deploy.yaml",
+            "site.yml",
+        ]
+
+    def test_excluded_dirs_pruned_at_any_depth(self, tmp_path):
+        """Test excluded directory names are skipped below the root too."""
+        nested = tmp_path / "playbooks" / "group_vars"
+        nested.mkdir(parents=True)
+        (nested / "all.yml").write_text("---\n")
+        (tmp_path / "playbooks" / "site.yml").write_text("---\n")
+
+        assert discover_playbooks(str(tmp_path)) == ["playbooks/site.yml"]
+
+    def test_cache_follows_new_files(self, tmp_path):
+        """Test cached results are refreshed when files are added."""
+        (tmp_path / "playbooks").mkdir()
+        os.utime(tmp_path / "playbooks", ns=(0, 0))
+        assert discover_playbooks(str(tmp_path)) == []
+
+        (tmp_path / "playbooks" / "new.yml").write_text("---\n")
+
+        assert discover_playbooks(str(tmp_path)) == ["playbooks/new.yml"]
+
+    def test_single_traversal(self, tmp_path, monkeypatch):
+        """Test the walk scans each directory once for both suffixes."""
+        (tmp_path / "site.yml").write_text("---\n")
+        (tmp_path / "playbooks").mkdir()
+        (tmp_path / "playbooks" / "deploy.yaml").write_text("---\n")
+        scanned = []
+        real_scandir = os.scandir
+
+        def counting_scandir(path):
+            scanned.append(path)
+            return real_scandir(path)
+
+        monkeypatch.setattr(os, "scandir", counting_scandir)
+        walk = _discover_playbooks_cached.__wrapped__
+
+        assert walk(str(tmp_path), 0, 0) == ("playbooks/deploy.yaml", "site.yml")
+        assert sorted(scanned) == [str(tmp_path), str(tmp_path / "playbooks")]
+
+    def test_cache_expires_for_deep_changes(self, tmp_path, monkeypatch):
+        """Test files added below checked directories appear after the TTL."""
+        (tmp_path / "playbooks" / "web").mkdir(parents=True)
+        now = [1000.0]
+        monkeypatch.setattr(time, "monotonic", lambda: now[0])
+        assert discover_playbooks(str(tmp_path)) == []
+
+        (tmp_path / "playbooks" / "web" / "deploy.yml").write_text("---\n")
+        now[0] += PLAYBOOK_CACHE_TTL
+
+        assert discover_playbooks(str(tmp_path)) == ["playbooks/web/deploy.yml"]
+
+    def test_missing_directory(self, tmp_path):
+        """Test a missing root yields no playbooks."""
+        assert discover_playbooks(str(tmp_path / "missing")) == []
+
+
+class TestModuleArgs:
+    """Test cases for module argument conversion."""
+
+    def test_simple_values(self):
+        """Test plain values are emitted unquoted."""
+        args = {"name": "nginx", "state": "started", "enabled": True, "port": 80}
+
+        assert dict_to_module_args(args) == (
+            "name=nginx state=started enabled=true port=80"
+        )
+
+    def test_special_values_round_trip(self):
+        """Test values needing quotes are parsed back intact by Ansible."""
+        args = {
+            "msg": 'it\'s a "quoted" message',
+            "path": "C:\\Program Files",
+            "cmd": "echo $HOME",
+            "dest": "C:\\Temp\\",
+            "src": "C:\\new",
+            "share": "C:\\Program Files\\",
+            "quoted": 'it\'s "here"\\',
+        }
+
+        assert parse_kv(dict_to_module_args(args)) == args
+
+    def test_backslashes_stay_unquoted(self):
+        """Test paths without whitespace or quotes are not quoted."""
+        assert dict_to_module_args({"dest": "C:\\Temp\\"}) == "dest=C:\\\\Temp\\\\"
+
+    def test_structured_values(self):
+        """Test dicts and lists are passed as JSON."""
+        parsed = parse_kv(dict_to_module_args({"data": {"a": [1, 2]}}))
+
+        assert json.loads(parsed["data"]) == {"a": [1, 2]}
+
+    def test_structured_values_compact(self):
+        """Test JSON is emitted without separator whitespace."""
+        assert dict_to_module_args({"data": {"a": [1, 2]}}) == "data='{\"a\":[1,2]}'"
+
+    def test_non_string_keys(self):
+        """Test mappings with non-string keys are still encoded."""
+        parsed = parse_kv(dict_to_module_args({"codes": {200: "ok"}}))
+
+        assert json.loads(parsed["codes"]) == {"200": "ok"}
+
+    def test_mapping_subclass(self):
+        """Test dict subclasses are still passed as JSON."""
+        args = dict_to_module_args({"data": OrderedDict(a=1)})
+
+        assert args == "data='{\"a\":1}'"
+
+
+class TestSplitPaths:
+    """Test cases for colon-separated path splitting."""
+
+    def test_strips_and_drops_empty(self):
+        """Test entries are trimmed and blank entries dropped."""
+        assert split_paths(" roles : ::/etc/ansible/roles ") == [
+            "roles",
+            "/etc/ansible/roles",
+        ]
+
+    def test_empty(self):
+        """Test missing or empty input yields no paths."""
+        assert split_paths(None) == []
+        assert split_paths("") == []
+
+
+class TestParseLogTimestamp:
+    """Test cases for log timestamp extraction."""
+
+    def test_iso_timestamp(self):
+        """Test ISO timestamps are found."""
+        line = "2026-02-03T10:15:30 ERROR something failed"
+
+        assert parse_log_timestamp(line) == "2026-02-03T10:15:30"
+
+    def test_apache_timestamp(self):
+        """Test Apache access log timestamps are found."""
+        line = '127.0.0.1 - - [03/Feb/2026:10:15:30 +0000] "GET / HTTP/1.1" 200'
+
+        assert parse_log_timestamp(line) == "03/Feb/2026:10:15:30"
+
+    def test_syslog_timestamp(self):
+        """Test syslog timestamps are found."""
+        line = "Feb  3 10:15:30 web01 sshd[123]: Accepted publickey"
+
+        assert parse_log_timestamp(line) == "Feb  3 10:15:30"
+
+    def test_ignores_non_ascii_digits(self):
+        """Test digits outside ASCII do not form a timestamp."""
+        assert parse_log_timestamp("\u0662\u0660\u0662\u0666-02-03 10:15:30") is None
+
+    def test_no_timestamp(self):
+        """Test lines without a timestamp yield None."""
+        assert parse_log_timestamp("no timestamp here") is None
+
+
+class TestSnapshotId:
+    """Test cases for snapshot ID generation."""
+
+    def test_format(self):
+        """Test snapshot IDs carry a timestamp and an 8 hex digit suffix."""
+        snapshot_id = generate_snapshot_id()
+
+        prefix, date, time, suffix = snapshot_id.split("_")
+        assert prefix == "snapshot"
+        assert len(date) == 8 and date.isdigit()
+        assert len(time) == 6 and time.isdigit()
+        assert len(suffix) == 8 and int(suffix, 16) >= 0
+
+    def test_unique(self):
+        """Test IDs generated in quick succession differ."""
+        ids = [generate_snapshot_id() for _ in range(1000)]
+
+        assert len(set(ids)) == len(ids)
+
+
+class TestCreateTempFile:
+    """Test cases for temporary file creation."""
+
+    def test_text_content(self):
+        """Test text content is written as UTF-8 with the given suffix."""
+        path = create_temp_file("name: caf\u00e9\n", suffix=".yml")
+        try:
+            assert path.endswith(".yml")
+            with open(path, encoding="utf-8") as f:
+                assert f.read() == "name: caf\u00e9\n"
+        finally:
+            os.unlink(path)
+
+    def test_bytes_content(self):
+        """Test bytes content is written unchanged."""
+        content = os.urandom(256 * 1024)
+
+        path = create_temp_file(content)
+        try:
+            with open(path, "rb") as f:
+                assert f.read() == content
+        finally:
+            os.unlink(path)
+
+
+class TestHealthScore:
+    """Test cases for host health scoring."""
+
+    def test_healthy_host(self):
+        """Test a host with no pressure scores full marks."""
+        assert calculate_health_score({}) == 100
+
+    def test_threshold_penalties(self):
+        """Test warning and critical thresholds deduct their penalties."""
+        assert calculate_health_score({"cpu_usage": 71}) == 85
+        assert calculate_health_score({"cpu_usage": 91}) == 70
+        assert calculate_health_score({"memory_usage": 80}) == 100
+        assert calculate_health_score({"memory_usage": 81}) == 85
+        assert calculate_health_score({"disk_usage": 86}) == 90
+        assert calculate_health_score({"disk_usage": 96}) == 75
+        assert calculate_health_score({"failed_services": 2}) == 80
+
+    def test_clamped_to_zero(self):
+        """Test heavy penalties never drive the score negative."""
+        metrics = {"cpu_usage": 99, "memory_usage": 99, "failed_services": 5}
+
+        assert calculate_health_score(metrics) == 0